@@ -0,0 +1,60 @@
+"""
+Static configuration shared by the app: MLB team data and the HTTP headers used for CBS Sports.
+Kept in its own module so it is built once per process rather than on every Streamlit rerun.
+"""
+
+from types import MappingProxyType
+
+# --- Configuration: MLB Teams Data ---
+# (Abbr, url_friendly_name, Mascot Name); MLB_TEAMS below adds the schedule URL
+_MLB_TEAMS_RAW = {
+    "Arizona Diamondbacks": ("ARI", "arizona-diamondbacks", "Diamondbacks"),
+    "Atlanta Braves": ("ATL", "atlanta-braves", "Braves"),
+    "Baltimore Orioles": ("BAL", "baltimore-orioles", "Orioles"),
+    "Boston Red Sox": ("BOS", "boston-red-sox", "Red Sox"),
+    "Chicago Cubs": ("CHC", "chicago-cubs", "Cubs"),
+    "Chicago White Sox": ("CHW", "chicago-white-sox", "White Sox"),
+    "Cincinnati Reds": ("CIN", "cincinnati-reds", "Reds"),
+    "Cleveland Guardians": ("CLE", "cleveland-guardians", "Guardians"),
+    "Colorado Rockies": ("COL", "colorado-rockies", "Rockies"),
+    "Detroit Tigers": ("DET", "detroit-tigers", "Tigers"),
+    "Houston Astros": ("HOU", "houston-astros", "Astros"),
+    "Kansas City Royals": ("KC", "kansas-city-royals", "Royals"),
+    "Los Angeles Angels": ("LAA", "los-angeles-angels", "Angels"),
+    "Los Angeles Dodgers": ("LAD", "los-angeles-dodgers", "Dodgers"),
+    "Miami Marlins": ("MIA", "miami-marlins", "Marlins"),
+    "Milwaukee Brewers": ("MIL", "milwaukee-brewers", "Brewers"),
+    "Minnesota Twins": ("MIN", "minnesota-twins", "Twins"),
+    "New York Mets": ("NYM", "new-york-mets", "Mets"),
+    "New York Yankees": ("NYY", "new-york-yankees", "Yankees"),
+    "Athletics": ("ATH", "athletics", "Athletics"),
+    "Philadelphia Phillies": ("PHI", "philadelphia-phillies", "Phillies"),
+    "Pittsburgh Pirates": ("PIT", "pittsburgh-pirates", "Pirates"),
+    "San Diego Padres": ("SD", "san-diego-padres", "Padres"),
+    "San Francisco Giants": ("SF", "san-francisco-giants", "Giants"),
+    "Seattle Mariners": ("SEA", "seattle-mariners", "Mariners"),
+    "St. Louis Cardinals": ("STL", "st-louis-cardinals", "Cardinals"),
+    "Tampa Bay Rays": ("TB", "tampa-bay-rays", "Rays"),
+    "Texas Rangers": ("TEX", "texas-rangers", "Rangers"),
+    "Toronto Blue Jays": ("TOR", "toronto-blue-jays", "Blue Jays"),
+    "Washington Nationals": ("WSH", "washington-nationals", "Nationals"),
+}
+
+# Append the CBS Sports schedule URL once at import: (Abbr, url_friendly_name, Mascot Name, Schedule URL)
+# Both tables are read-only views, so the scrape worker threads can share them safely
+MLB_TEAMS = MappingProxyType({
+    name: (abbr, url_name, mascot, f"https://www.cbssports.com/mlb/teams/{abbr}/{url_name}/schedule/")
+    for name, (abbr, url_name, mascot) in _MLB_TEAMS_RAW.items()
+})
+
+# For reverse lookup of abbreviation to full name and mascot
+MLB_TEAMS_BY_ABBR = MappingProxyType({details[0]: (name, details[2]) for name, details in MLB_TEAMS.items()})
+
+# Derived once from MLB_TEAMS, which never changes at runtime
+SORTED_TEAM_NAMES = sorted(MLB_TEAMS.keys())
+
+# --- HTTP: request headers for CBS Sports schedule pages ---
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml',
+}
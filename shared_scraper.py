@@ -0,0 +1,341 @@
+"""
+Scraping layer for CBS Sports team schedule pages: the pooled HTTP session, the bounded page
+read and the parse that finds a team's next upcoming game. Kept out of the Streamlit script so
+its patterns, caches and helpers are set up once per process rather than on every rerun.
+"""
+
+import streamlit as st
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from bs4 import BeautifulSoup, SoupStrainer
+import threading
+import time
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import re
+
+from constants import MLB_TEAMS, HEADERS
+from ttl_store import TTLStore
+
+# Prefer the C-backed lxml parser; fall back to the stdlib parser where lxml isn't installed
+try:
+    import lxml
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+# --- Precompiled patterns ---
+_WS_RE = re.compile(r'\s+')
+_SLUG_RE = re.compile(r'[^\W_]+(?:-[^\W_]+)+')  # Player URL slug, e.g. "zack-wheeler"
+_SCHEDULE_TABLE_OPEN_RE = re.compile(rb'<table[^>]*TableBase-table')
+_STATS_PAREN_RE = re.compile(r'\([^()]+\)')  # Starter's "(W-L, ERA)" line
+
+# Game-status patterns used by is_game_not_upcoming (all case-insensitive)
+_SCORE_RE = re.compile(r'\b[A-Z]{2,4}\s+\d+\s*(?:,|\s*-\s*)\s*[A-Z]{2,4}\s+\d+', re.IGNORECASE)
+_STATUS_KEYWORDS_RE = re.compile(r'\b(Final|F(?:/\d+)?|PPD|Postponed|Cancelled|Canceled|Suspended|Delayed|Live|In\s*Progress)\b', re.IGNORECASE)
+_INNING_INDICATORS_RE = re.compile(r'(?:-\s*|\b)([1-9]\d*(?:st|nd|rd|th)|[Tt]op\s*\d+|[Bb]ot\s*\d+|[Mm]id\s*\d+)\b', re.IGNORECASE)
+_SCHEDULED_TIME_RE = re.compile(r'\d{1,2}:\d{2}\s*(?:[AP]\.?M\.?)\s*(?:[ECMP][SD]?T)?', re.IGNORECASE)
+
+# Only the TableBase-table elements are built when parsing a schedule page
+SCHEDULE_TABLE_STRAINER = SoupStrainer('table', class_='TableBase-table')
+# Upper bound on how much of a schedule page is read before parsing
+MAX_SCHEDULE_PAGE_BYTES = 1024 * 1024
+# Politeness limits for multi-team scrapes against cbssports.com
+MAX_CONCURRENT_SCRAPES = 6
+MAX_REQUESTS_PER_SECOND = 4
+# Trimmed schedule pages are also kept on disk so a restarted app doesn't refetch them
+SCHEDULE_CACHE_TTL = 600 # seconds
+SCHEDULE_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "schedule_cache.sqlite3")
+
+@st.cache_resource
+def get_http_session():
+    """
+    Returns a process-wide requests.Session so the connection to cbssports.com is
+    kept alive across scrapes and Streamlit reruns.
+    """
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    # raise_on_status=False hands back the last response once retries run out, so
+    # raise_for_status() reports the real status code (e.g. 429) to the caller.
+    # Retry-After is ignored so a long server-sent wait can't stall a scrape; backoff_factor
+    # bounds the sleeps between the retries instead
+    retry = Retry(
+        total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504],
+        raise_on_status=False, respect_retry_after_header=False,
+    )
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retry))
+    return session
+
+class RequestRateLimiter:
+    """Spaces out request starts so that at most max_per_second begin each second, across all threads."""
+
+    def __init__(self, max_per_second):
+        self._interval = 1.0 / max_per_second
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait(self):
+        with self._lock:
+            slot = max(time.monotonic(), self._next_slot)
+            self._next_slot = slot + self._interval
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+@st.cache_resource
+def get_request_rate_limiter():
+    """Returns the process-wide limiter shared by every scrape that actually hits the network."""
+    return RequestRateLimiter(MAX_REQUESTS_PER_SECOND)
+
+@st.cache_resource
+def get_schedule_page_store():
+    """
+    Process-wide {team_url: trimmed page bytes} store. It sits under st.cache_data so pages
+    fetched in the last SCHEDULE_CACHE_TTL seconds survive an app restart.
+    """
+    return TTLStore.open(SCHEDULE_CACHE_PATH, SCHEDULE_CACHE_TTL)
+
+class _EmptyCell:
+    """Stand-in for a missing <td>; provides just the parts of the Tag API the scraper uses."""
+
+    def get_text(self, *args, **kwargs):
+        return ""
+
+    def find(self, *args, **kwargs):
+        return None
+
+_EMPTY_CELL = _EmptyCell()
+
+def get_cell_text(cell_td):
+    """Returns the cell's text with all runs of whitespace collapsed to single spaces."""
+    return _WS_RE.sub(' ', cell_td.get_text(separator=' ', strip=True)).strip()
+
+# The same starters show up on every rerun, so the slug -> display name transform is memoized per process
+@lru_cache(maxsize=512)
+def _slug_to_name(name_slug):
+    """Turns a player URL slug like 'zack-wheeler' into 'Zack Wheeler'; None if it doesn't look like a name."""
+    if _SLUG_RE.fullmatch(name_slug):
+        return name_slug.replace('-', ' ').title()
+    return None
+
+def get_starter_info(cell_td):
+    full_name_from_url = None
+    link_tag = cell_td.find('a')
+    if link_tag and link_tag.has_attr('href'):
+        player_url_path = link_tag['href']
+        path_segments = player_url_path.strip('/').split('/')
+        if len(path_segments) > 0:
+            full_name_from_url = _slug_to_name(path_segments[-1])
+
+    # One pass over the cell's text serves both the stats lookup and the fallback
+    cell_text = cell_td.get_text(separator=' ', strip=True)
+    if full_name_from_url:
+        # Only the first "(W-L, ERA)" token is needed
+        stats_match = _STATS_PAREN_RE.search(cell_text)
+        stats_text = stats_match.group(0) if stats_match else ""
+        return f"{full_name_from_url} {stats_text}".strip()
+    else:
+        return cell_text if cell_text else "N/A"
+# Helper function to determine if a game is not upcoming (i.e., in progress, final, PPD, etc.)
+def is_game_not_upcoming(time_tv_str):
+    """
+    Checks if the time_tv_str indicates a game is in progress, final, postponed, etc.
+    Returns True if the game is NOT upcoming, False otherwise.
+    """
+    # Case insensitive search for these patterns
+
+    # Pattern 1: Scores (e.g., "TEAM1 X, TEAM2 Y" or "TEAM1 X - TEAM2 Y")
+    # Example: "ATH 2, LAA 0 - 2nd" or "PHI 5 - NYM 1"
+    if _SCORE_RE.search(time_tv_str):
+        return True
+
+    # Pattern 2: Explicit game status words
+    # Example: "Final", "PPD", "Live", "In Progress", "Delayed", "Suspended", "Cancelled"
+    # We also look for inning indicators if they are not part of a simple time string.
+    # Example: "Top 5th", "Bot 3rd", "- 2nd", "Mid 7"
+    if _STATUS_KEYWORDS_RE.search(time_tv_str):
+        return True
+    
+    # If an inning indicator is present AND it's not clearly part of a scheduled time
+    # (e.g., to avoid matching "7:00 PM 4th street" if that were a venue, though unlikely in this cell)
+    # A simple check: if inning indicator exists and no clear PM/AM time, assume status.
+    if _INNING_INDICATORS_RE.search(time_tv_str):
+        # If it does NOT look like a standard future time string (e.g., "7:05 PM ET")
+        # then an inning indicator likely means it's in progress.
+        if not _SCHEDULED_TIME_RE.search(time_tv_str):
+            return True
+        # If it looks like a future time but also contains a clear status word (handled by status_keywords)
+        # like "7:05 PM ET - PPD", it's already caught.
+        # This is for more ambiguous cases like "Bot 7th" alone.
+
+    return False # Otherwise, assume it's an upcoming game (or just a time like "7:05 PM ET" or "TBD")
+    
+def read_schedule_html(response):
+    """
+    Reads a streamed schedule page only until the schedule table (the second TableBase-table)
+    has closed, or MAX_SCHEDULE_PAGE_BYTES have been read, so the scripts and footer after it
+    are never parsed. The rest of the body is discarded undecoded to free the pooled connection.
+    """
+    buf = bytearray()
+    tables_opened = 0
+    search_pos = 0
+    for chunk in response.iter_content(chunk_size=16384):
+        buf += chunk
+        while tables_opened < 2:
+            match = _SCHEDULE_TABLE_OPEN_RE.search(buf, search_pos)
+            if not match:
+                break
+            tables_opened += 1
+            search_pos = match.end()
+        if tables_opened == 2 and buf.find(b'</table>', search_pos) != -1:
+            break
+        if len(buf) >= MAX_SCHEDULE_PAGE_BYTES:
+            break
+    response.raw.drain_conn()
+    response.raw.release_conn()
+    return bytes(buf)
+
+class ScrapeError(Exception):
+    """A scrape failed; the message explains why and is shown to the user."""
+
+@st.cache_data(ttl=SCHEDULE_CACHE_TTL, show_spinner=False)
+def _cached_team_schedule(team_url, team_display_name):
+    """
+    Scrapes the next upcoming game for a team and returns (game_data, warning_or_None, fetched_at),
+    where fetched_at is the time.time() the page was downloaded (it may come from the page store).
+    Failures raise ScrapeError, which st.cache_data does not cache, so the next call retries.
+    """
+    stored_page = get_schedule_page_store().get_entry(team_url)
+    fetched = stored_page is None
+    if fetched:
+        try:
+            get_request_rate_limiter().wait()
+            response = get_http_session().get(team_url, timeout=15, stream=True)
+            response.raise_for_status()
+            fetched_at = time.time()
+            page_html = read_schedule_html(response)
+            del response # The trimmed page bytes are all that's needed from here on
+        except requests.exceptions.RequestException as e:
+            if e.response is not None and e.response.status_code == 429:
+                raise ScrapeError(f"CBS Sports is rate limiting requests (HTTP 429) for {team_display_name}. Please try again later.")
+            raise ScrapeError(f"Error fetching URL for {team_display_name}: {team_url}\nDetails: {e}")
+    else:
+        fetched_at, page_html = stored_page
+        del stored_page
+
+    soup = BeautifulSoup(page_html, HTML_PARSER, parse_only=SCHEDULE_TABLE_STRAINER)
+    tables = soup.find_all('table', class_='TableBase-table', limit=2)
+
+    if not tables:
+        raise ScrapeError(f"No tables with class 'TableBase-table' found on the page for {team_display_name}.")
+    
+    if len(tables) < 2:
+        raise ScrapeError(f"Found {len(tables)} table(s) with class 'TableBase-table' for {team_display_name}, but expected at least 2. Cannot find the schedule table.")
+
+    # Only persist pages that have the schedule table, so bot-check or changed-layout pages aren't kept
+    if fetched:
+        get_schedule_page_store().put(team_url, page_html)
+    del page_html # Don't keep the raw bytes alive next to the parsed tree
+
+    # Rows and cells are direct children, so searches don't descend into the links/spans inside cells
+    schedule_table = tables[1]
+    tbody = schedule_table.find('tbody', recursive=False)
+    if not tbody:
+        raise ScrapeError(f"Could not find a <tbody> in the schedule table for {team_display_name}.")
+    
+    all_data_rows = tbody.find_all('tr', recursive=False)
+    if not all_data_rows:
+        raise ScrapeError(f"No data rows (<tr>) found in the <tbody> of the schedule table for {team_display_name}.")
+
+    game_to_process = None # This will store the data of the first valid upcoming game
+    warning_msg = None
+
+    for row_idx, row in enumerate(all_data_rows):
+        cells = row.find_all('td', recursive=False, limit=6) # Only the first six columns are used
+        
+        # Need at least 3 cells for Date, Opponent, Time/TV
+        if len(cells) < 3:
+            # st.info(f"Row {row_idx+1} has too few cells ({len(cells)}), skipping.") # Optional: for debugging
+            continue
+
+        time_tv_val_raw = get_cell_text(cells[2])
+
+        if is_game_not_upcoming(time_tv_val_raw):
+            continue # Skip to the next row
+        
+        # If we reach here, this row is the next upcoming game
+        # Ensure we have enough cells for all data points
+        if len(cells) < 6:
+            warning_msg = f"Warning: Upcoming game in row {row_idx+1} has fewer than 6 cells ({len(cells)} found). Data might be incomplete. Cells: {[c.get_text(strip=True) for c in cells]}"
+            # Pad with empty cell content if necessary, so subsequent processing doesn't fail
+            cells.extend([_EMPTY_CELL] * (6 - len(cells)))
+        
+        # time_tv_val_raw (cells[2]) is already extracted and is for the upcoming game
+        date_val, opp_val_raw, venue_val = (get_cell_text(cells[i]) for i in (0, 1, 3))
+        
+        home_starter_val = get_starter_info(cells[4])
+        away_starter_val = get_starter_info(cells[5])
+
+        game_to_process = {
+            "Date": date_val,
+            "OPP_raw": opp_val_raw,
+            "Time_TV_raw": time_tv_val_raw, # This is the one for the upcoming game
+            "Venue": venue_val,
+            "Home_starter": home_starter_val,
+            "Away_starter": away_starter_val,
+            "Scraped_team_full_name": team_display_name
+        }
+        break # Exit the loop since we found our game
+
+    if not game_to_process:
+        raise ScrapeError(f"No suitable upcoming (non-in-progress/final/PPD) games found for {team_display_name} in the schedule.")
+
+    return game_to_process, warning_msg, fetched_at
+
+def scrape_team_schedule_with_fetch_time(team_url, team_display_name):
+    """
+    Like scrape_team_schedule, but returns (game_data, message, fetched_at), where fetched_at is
+    the time.time() the schedule page was downloaded, or None when scraping failed.
+    """
+    try:
+        game_data, warning_msg, fetched_at = _cached_team_schedule(team_url, team_display_name)
+        if time.time() - fetched_at >= SCHEDULE_CACHE_TTL:
+            # A stored page was already part-way through its TTL when st.cache_data kept the
+            # result, so the result outlived the page; scrape again rather than serve it stale
+            _cached_team_schedule.clear(team_url, team_display_name)
+            game_data, warning_msg, fetched_at = _cached_team_schedule(team_url, team_display_name)
+        return game_data, warning_msg, fetched_at
+    except ScrapeError as e:
+        return None, str(e), None
+
+def scrape_team_schedule(team_url, team_display_name):
+    """
+    Scrapes the next upcoming game for a team.
+    Returns a (game_data, message) tuple. game_data is None when scraping failed and message
+    explains why; when game_data is present, message is an optional warning (or None).
+    Only successful scrapes are cached, and never for longer than SCHEDULE_CACHE_TTL after the
+    page was fetched; Streamlit calls are left to the caller.
+    """
+    game_data, message, _ = scrape_team_schedule_with_fetch_time(team_url, team_display_name)
+    return game_data, message
+
+def forget_team_schedule(team_url, team_display_name):
+    """Drops a team's cached scrape result and stored page, so the next scrape fetches it again."""
+    _cached_team_schedule.clear(team_url, team_display_name)
+    get_schedule_page_store().discard(team_url)
+
+def scrape_many_teams(team_names, max_workers=MAX_CONCURRENT_SCRAPES):
+    """
+    Scrapes several teams concurrently. The work is network-bound, so a small thread pool
+    sharing the pooled HTTP session overlaps the round-trips; the pool size caps concurrency
+    and the shared rate limiter caps how fast new requests start.
+    Returns {team_name: (game_data, message)} in the order of team_names.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            name: executor.submit(scrape_team_schedule, MLB_TEAMS[name][3], name)
+            for name in team_names
+        }
+        return {name: future.result() for name, future in futures.items()}
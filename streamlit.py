@@ -1,235 +1,87 @@
 import streamlit as st
-import requests
-from bs4 import BeautifulSoup
-import pandas as pd
-import google.generativeai as genai
 from datetime import datetime
+import time
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import chain
 import re # For parsing time and opponent
 
-# --- Configuration: MLB Teams Data ---
-# (Abbr, url_friendly_name, Mascot Name)
-MLB_TEAMS = {
-    "Arizona Diamondbacks": ("ARI", "arizona-diamondbacks", "Diamondbacks"),
-    "Atlanta Braves": ("ATL", "atlanta-braves", "Braves"),
-    "Baltimore Orioles": ("BAL", "baltimore-orioles", "Orioles"),
-    "Boston Red Sox": ("BOS", "boston-red-sox", "Red Sox"),
-    "Chicago Cubs": ("CHC", "chicago-cubs", "Cubs"),
-    "Chicago White Sox": ("CHW", "chicago-white-sox", "White Sox"),
-    "Cincinnati Reds": ("CIN", "cincinnati-reds", "Reds"),
-    "Cleveland Guardians": ("CLE", "cleveland-guardians", "Guardians"),
-    "Colorado Rockies": ("COL", "colorado-rockies", "Rockies"),
-    "Detroit Tigers": ("DET", "detroit-tigers", "Tigers"),
-    "Houston Astros": ("HOU", "houston-astros", "Astros"),
-    "Kansas City Royals": ("KC", "kansas-city-royals", "Royals"),
-    "Los Angeles Angels": ("LAA", "los-angeles-angels", "Angels"),
-    "Los Angeles Dodgers": ("LAD", "los-angeles-dodgers", "Dodgers"),
-    "Miami Marlins": ("MIA", "miami-marlins", "Marlins"),
-    "Milwaukee Brewers": ("MIL", "milwaukee-brewers", "Brewers"),
-    "Minnesota Twins": ("MIN", "minnesota-twins", "Twins"),
-    "New York Mets": ("NYM", "new-york-mets", "Mets"),
-    "New York Yankees": ("NYY", "new-york-yankees", "Yankees"),
-    "Athletics": ("ATH", "athletics", "Athletics"),
-    "Philadelphia Phillies": ("PHI", "philadelphia-phillies", "Phillies"),
-    "Pittsburgh Pirates": ("PIT", "pittsburgh-pirates", "Pirates"),
-    "San Diego Padres": ("SD", "san-diego-padres", "Padres"),
-    "San Francisco Giants": ("SF", "san-francisco-giants", "Giants"),
-    "Seattle Mariners": ("SEA", "seattle-mariners", "Mariners"),
-    "St. Louis Cardinals": ("STL", "st-louis-cardinals", "Cardinals"),
-    "Tampa Bay Rays": ("TB", "tampa-bay-rays", "Rays"),
-    "Texas Rangers": ("TEX", "texas-rangers", "Rangers"),
-    "Toronto Blue Jays": ("TOR", "toronto-blue-jays", "Blue Jays"),
-    "Washington Nationals": ("WSH", "washington-nationals", "Nationals"),
-}
-
-# For reverse lookup of abbreviation to full name and mascot
-MLB_TEAMS_BY_ABBR = {details[0]: (name, details[2]) for name, details in MLB_TEAMS.items()}
-
-
-HEADERS = {
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-}
+from constants import MLB_TEAMS, MLB_TEAMS_BY_ABBR, SORTED_TEAM_NAMES
+from ttl_store import TTLStore
+from shared_scraper import (
+    MAX_CONCURRENT_SCRAPES, SCHEDULE_CACHE_TTL, scrape_team_schedule, scrape_team_schedule_with_fetch_time,
+    scrape_many_teams, forget_team_schedule,
+)
+
+# Team picker options, built from the static team table in constants.py
+TEAM_SELECT_PLACEHOLDER = "-- Select a Team --"
+TEAM_SELECT_OPTIONS = (TEAM_SELECT_PLACEHOLDER, *SORTED_TEAM_NAMES)
+
+# --- Precompiled patterns ---
+# "7:05 PM", "7:05 p.m." (group 2) or a bare "7:05p" (group 3), in one search
+_TIME_RE = re.compile(r'(\d{1,2}:\d{2})(?:\s*([apAP])\.?[mM]\.?|([apAP]))')
+_DIGIT_COLON_RE = re.compile(r'\d{1,2}:\d{2}')
+
+# TV channel abbreviations spelled out in snippets, and time tokens that are never a channel
+_TV_MAP = {"ATV": "Apple TV", "AMZN": "Amazon", "MLBN": "MLB Network"}
+_TV_SUB_RE = re.compile(r'\b(?:' + '|'.join(map(re.escape, _TV_MAP)) + r')\b')
+_TV_IGNORE = frozenset(('et', 'pm', 'am', 'p', 'a', 'p.m.', 'a.m.'))
+
 
 # --- Gemini API Configuration ---
+@st.cache_resource
+def get_gemini_model():
+    """
+    Configures the Gemini SDK and builds the model once per process, so reruns reuse the same
+    client. Failures raise and are therefore not cached; the next rerun tries again.
+    The SDK is imported only once a key is present, so keyless deployments never load it.
+    """
+    api_key = st.secrets["GEMINI_API_KEY"]
+    import google.generativeai as genai
+    genai.configure(api_key=api_key)
+    return genai.GenerativeModel('gemini-1.5-flash-latest') # or 'gemini-pro'
+
 try:
-    GEMINI_API_KEY = st.secrets["GEMINI_API_KEY"]
-    genai.configure(api_key=GEMINI_API_KEY)
-    gemini_model = genai.GenerativeModel('gemini-1.5-flash-latest') # or 'gemini-pro'
+    gemini_model = get_gemini_model()
 except KeyError:
-    GEMINI_API_KEY = None
     gemini_model = None
     st.error("GEMINI_API_KEY not found in Streamlit secrets. Snippet generation will be disabled.")
 except Exception as e:
-    GEMINI_API_KEY = None
     gemini_model = None
     st.error(f"Error configuring Gemini API: {e}. Snippet generation will be disabled.")
 
 
-def generate_team_url(team_abbr, team_url_name):
-    return f"https://www.cbssports.com/mlb/teams/{team_abbr.upper()}/{team_url_name}/schedule/"
-
-def get_starter_info(cell_td):
-    full_name_from_url = None
-    stats_text = ""
-    link_tag = cell_td.find('a')
-    if link_tag and link_tag.has_attr('href'):
-        player_url_path = link_tag['href']
-        path_segments = player_url_path.strip('/').split('/')
-        if len(path_segments) > 0:
-            name_slug = path_segments[-1]
-            if '-' in name_slug and all(c.isalnum() or c == '-' for c in name_slug):
-                name_parts = name_slug.split('-')
-                capitalized_names = [part.capitalize() for part in name_parts]
-                full_name_from_url = " ".join(capitalized_names)
-
-    cell_all_texts = list(cell_td.stripped_strings)
-    for text_part in cell_all_texts:
-        if text_part.startswith("(") and text_part.endswith(")"):
-            stats_text = text_part
-            break
-    if full_name_from_url:
-        return f"{full_name_from_url} {stats_text}".strip()
-    else:
-        original_text = " ".join(cell_all_texts)
-        return original_text if original_text else "N/A"
-# Helper function to determine if a game is not upcoming (i.e., in progress, final, PPD, etc.)
-def is_game_not_upcoming(time_tv_str):
-    """
-    Checks if the time_tv_str indicates a game is in progress, final, postponed, etc.
-    Returns True if the game is NOT upcoming, False otherwise.
-    """
-    # Case insensitive search for these patterns
-
-    # Pattern 1: Scores (e.g., "TEAM1 X, TEAM2 Y" or "TEAM1 X - TEAM2 Y")
-    # Example: "ATH 2, LAA 0 - 2nd" or "PHI 5 - NYM 1"
-    if re.search(r'\b[A-Z]{2,4}\s+\d+\s*(?:,|\s*-\s*)\s*[A-Z]{2,4}\s+\d+', time_tv_str, re.IGNORECASE):
-        return True
-
-    # Pattern 2: Explicit game status words
-    # Example: "Final", "PPD", "Live", "In Progress", "Delayed", "Suspended", "Cancelled"
-    # We also look for inning indicators if they are not part of a simple time string.
-    # Example: "Top 5th", "Bot 3rd", "- 2nd", "Mid 7"
-    status_keywords = r'\b(Final|F(?:/\d+)?|PPD|Postponed|Cancelled|Canceled|Suspended|Delayed|Live|In\s*Progress)\b'
-    inning_indicators = r'(?:-\s*|\b)([1-9]\d*(?:st|nd|rd|th)|[Tt]op\s*\d+|[Bb]ot\s*\d+|[Mm]id\s*\d+)\b'
-
-    if re.search(status_keywords, time_tv_str, re.IGNORECASE):
-        return True
-    
-    # If an inning indicator is present AND it's not clearly part of a scheduled time
-    # (e.g., to avoid matching "7:00 PM 4th street" if that were a venue, though unlikely in this cell)
-    # A simple check: if inning indicator exists and no clear PM/AM time, assume status.
-    if re.search(inning_indicators, time_tv_str, re.IGNORECASE):
-        # If it does NOT look like a standard future time string (e.g., "7:05 PM ET")
-        # then an inning indicator likely means it's in progress.
-        if not re.search(r'\d{1,2}:\d{2}\s*(?:[AP]\.?M\.?)\s*(?:[ECMP][SD]?T)?', time_tv_str, re.IGNORECASE):
-            return True
-        # If it looks like a future time but also contains a clear status word (handled by status_keywords)
-        # like "7:05 PM ET - PPD", it's already caught.
-        # This is for more ambiguous cases like "Bot 7th" alone.
-
-    return False # Otherwise, assume it's an upcoming game (or just a time like "7:05 PM ET" or "TBD")
-    
-def scrape_team_schedule(team_url, team_display_name):
-    try:
-        response = requests.get(team_url, headers=HEADERS, timeout=15)
-        response.raise_for_status()
-    except requests.exceptions.RequestException as e:
-        st.error(f"Error fetching URL for {team_display_name}: {team_url}\nDetails: {e}")
-        return None
-
-    soup = BeautifulSoup(response.content, 'html.parser')
-    tables = soup.find_all('table', class_='TableBase-table')
-
-    if not tables:
-        st.error(f"No tables with class 'TableBase-table' found on the page for {team_display_name}.")
-        return None
-    
-    if len(tables) < 2:
-        st.error(f"Found {len(tables)} table(s) with class 'TableBase-table' for {team_display_name}, but expected at least 2. Cannot find the schedule table.")
-        return None
-
-    schedule_table = tables[1]
-    tbody = schedule_table.find('tbody')
-    if not tbody:
-        st.error(f"Could not find a <tbody> in the schedule table for {team_display_name}.")
-        return None
-    
-    all_data_rows = tbody.find_all('tr')
-    if not all_data_rows:
-        st.error(f"No data rows (<tr>) found in the <tbody> of the schedule table for {team_display_name}.")
-        return None
-
-    game_to_process = None # This will store the data of the first valid upcoming game
+# Schedule dates come as "Mon, Mar 25", "Mar 25, 2024", "Mar 25 2024" or "Mar 25"; tried in order
+_DATE_FORMATS = ("%a, %b %d", "%b %d, %Y", "%b %d %Y", "%b %d")
+# Anything else is reduced to its "Mar 25" token, e.g. "Mon, Mar 25 2024" or doubleheader "Sat, Jun 14 (1)"
+_MONTH_DAY_RE = re.compile(r'\b[A-Za-z]{3} \d{1,2}\b')
 
-    for row_idx, row in enumerate(all_data_rows):
-        cells = row.find_all('td')
-        
-        # Need at least 3 cells for Date, Opponent, Time/TV
-        if len(cells) < 3:
-            # st.info(f"Row {row_idx+1} has too few cells ({len(cells)}), skipping.") # Optional: for debugging
+def _format_game_date(date_str):
+    """Returns the date as "Month DD" (no year), or date_str unchanged if it can't be parsed."""
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(date_str, fmt).strftime("%B %d")
+        except ValueError:
             continue
-
-        time_tv_val_raw = " ".join(cells[2].get_text(separator=" ", strip=True).split())
-
-        if is_game_not_upcoming(time_tv_val_raw):
-            continue # Skip to the next row
-        
-        # If we reach here, this row is the next upcoming game
-        # Ensure we have enough cells for all data points
-        if len(cells) < 6:
-            st.warning(f"Warning: Upcoming game in row {row_idx+1} has fewer than 6 cells ({len(cells)} found). Data might be incomplete. Cells: {[c.get_text(strip=True) for c in cells]}")
-            # Pad with empty cell content if necessary, so subsequent processing doesn't fail
-            while len(cells) < 6:
-                empty_td_soup = BeautifulSoup("<td></td>", "html.parser")
-                cells.append(empty_td_soup.td)
-        
-        date_val = " ".join(cells[0].get_text(separator=" ", strip=True).split())
-        opp_val_raw = " ".join(cells[1].get_text(separator=" ", strip=True).split())
-        # time_tv_val_raw is already extracted and is for the upcoming game
-        venue_val = " ".join(cells[3].get_text(separator=" ", strip=True).split())
-        
-        home_starter_val = get_starter_info(cells[4])
-        away_starter_val = get_starter_info(cells[5])
-
-        game_to_process = {
-            "Date": date_val,
-            "OPP_raw": opp_val_raw,
-            "Time_TV_raw": time_tv_val_raw, # This is the one for the upcoming game
-            "Venue": venue_val,
-            "Home_starter": home_starter_val,
-            "Away_starter": away_starter_val,
-            "Scraped_team_full_name": team_display_name
-        }
-        break # Exit the loop since we found our game
-
-    if not game_to_process:
-        st.warning(f"No suitable upcoming (non-in-progress/final/PPD) games found for {team_display_name} in the schedule.")
-        return None
-
-    return game_to_process
-
-
+    month_day = _MONTH_DAY_RE.search(date_str)
+    if month_day:
+        try:
+            return datetime.strptime(month_day.group(0), "%b %d").strftime("%B %d")
+        except ValueError:
+            pass
+    return date_str # Fallback if parsing fails
+
+@st.cache_data(show_spinner=False, max_entries=64)
 def format_data_for_gemini_prompt(game_data, selected_team_info):
     """
     Formats the raw scraped game data according to specific rules for the Gemini prompt.
-    selected_team_info is a tuple: (abbr, url_name, mascot_name)
+    selected_team_info is a tuple: (abbr, url_name, mascot_name, schedule_url)
+    Cached on the values of both arguments; callers get their own copy of the result.
     """
     formatted = {}
 
     # 1. Date: Month and Date only (no year)
-    try:
-        # Handle dates like "Mon, Mar 25" or "Mar 25, 2024" or "Mar 25"
-        date_str = game_data['Date']
-        if ',' in date_str:
-            date_part = date_str.split(',')[1].strip() # "Mar 25" or "Mar 25 2024"
-            if len(date_part.split()) > 2: # e.g. "Mar 25 2024"
-                 date_part = " ".join(date_part.split()[:2])
-        else: # "Mar 25"
-            date_part = date_str
-
-        dt_obj = datetime.strptime(date_part, "%b %d")
-        formatted['date'] = dt_obj.strftime("%B %d")
-    except ValueError:
-        formatted['date'] = game_data['Date'] # Fallback if parsing fails
+    formatted['date'] = _format_game_date(game_data['Date'])
 
     # 2. Scraped Team: Mascot name only
     formatted['scraped_team_mascot'] = selected_team_info[2] # Mascot name from MLB_TEAMS
@@ -239,14 +91,18 @@ def format_data_for_gemini_prompt(game_data, selected_team_info):
     opp_raw = game_data['OPP_raw']
     opponent_full_name = opp_raw # Default
     
-    # Try to extract abbreviation like "NYM" from "vs NYM" or "@ NYM"
-    match = re.search(r'(?:vs\.?|@)\s*([A-Z]{2,3})', opp_raw)
-    if match:
-        opp_abbr = match.group(1)
-        if opp_abbr in MLB_TEAMS_BY_ABBR:
-            opponent_full_name = MLB_TEAMS_BY_ABBR[opp_abbr][0] # Full name
-    elif opp_raw.isupper() and len(opp_raw) in [2,3] and opp_raw in MLB_TEAMS_BY_ABBR: # e.g. "NYM"
-        opponent_full_name = MLB_TEAMS_BY_ABBR[opp_raw][0]
+    # Take the abbreviation after a leading "@", "vs." or "vs" ("@ NYM", "vs. NYM"), or a bare "NYM" as is.
+    # The cell text is already whitespace-normalised, so plain string ops are enough here.
+    opp_str = opp_raw.strip()
+    for prefix in ('@', 'vs.', 'vs'):
+        if opp_str.startswith(prefix):
+            opp_abbr = opp_str[len(prefix):].lstrip().split(' ', 1)[0]
+            break
+    else:
+        opp_abbr = opp_str
+    team_entry = MLB_TEAMS_BY_ABBR.get(opp_abbr) # Single lookup for both cases
+    if team_entry:
+        opponent_full_name = team_entry[0] # Full name
     else: # If it's already a full name or something else, clean it up
         opponent_full_name = opp_raw.replace("vs. ", "").replace("@ ", "").strip()
     formatted['opponent_full_name'] = opponent_full_name
@@ -267,19 +123,14 @@ def format_data_for_gemini_prompt(game_data, selected_team_info):
     formatted_tv = "Not specified"
 
     # Time: 0:00 p.m. ET
-    time_match = re.search(r'(\d{1,2}:\d{2})\s*([apAP])\.?[mM]\.?', time_tv_raw)
-    if not time_match: # try for "7:05p" format
-        time_match = re.search(r'(\d{1,2}:\d{2})([apAP])', time_tv_raw)
-
+    time_match = _TIME_RE.search(time_tv_raw)
     if time_match:
         time_part = time_match.group(1)
-        am_pm = time_match.group(2).lower()
+        am_pm = (time_match.group(2) or time_match.group(3)).lower()
         formatted_time = f"{time_part} {am_pm}.m. ET"
     elif "TBD" in time_tv_raw.upper():
         formatted_time = "TBD"
     
-    # TV Channel replacements
-    tv_replacements = {"ATV": "Apple TV", "AMZN": "Amazon", "MLBN": "MLB Network"}
     # Try to extract TV part (often after " / " or if time is TBD, the whole string)
     if "/" in time_tv_raw:
         potential_tv = time_tv_raw.split('/')[-1].strip()
@@ -290,14 +141,12 @@ def format_data_for_gemini_prompt(game_data, selected_team_info):
         potential_tv = ""
         # Find part that isn't time and isn't ET
         for part in parts:
-            if not re.match(r'\d{1,2}:\d{2}',part) and part.lower() not in ['et', 'pm', 'am', 'p', 'a', 'p.m.', 'a.m.']:
+            if not _DIGIT_COLON_RE.match(part) and part.lower() not in _TV_IGNORE:
                 potential_tv = part
                 break
     
-    if 'potential_tv' in locals() and potential_tv:
-        for short, long_name in tv_replacements.items():
-            potential_tv = potential_tv.replace(short, long_name)
-        formatted_tv = potential_tv
+    if potential_tv: # TV Channel replacements, all in one pass
+        formatted_tv = _TV_SUB_RE.sub(lambda m: _TV_MAP[m.group(0)], potential_tv)
     
     formatted['time'] = formatted_time
     formatted['tv'] = formatted_tv
@@ -318,105 +167,271 @@ def format_data_for_gemini_prompt(game_data, selected_team_info):
 
     return formatted
 
-def generate_game_snippet(formatted_game_data):
-    if not gemini_model:
-        return "Gemini API not configured. Cannot generate snippet."
+# Caps the 1-2 sentence snippet (~50 words, plus both starters' records) so a runaway generation
+# can't add latency or token cost; a snippet that hits the cap is treated as a failure, not cached
+SNIPPET_GENERATION_CONFIG = {'max_output_tokens': 120, 'temperature': 0.4}
+SNIPPET_CACHE_TTL = 3600 # seconds
+SNIPPET_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "snippet_cache.sqlite3")
+
+SNIPPET_PROMPT_RULES = """You are a sports journalist. Write a 1-2 sentence snippet about the upcoming MLB game below, in a human, professional tone suitable for embedding directly in a news article.
+Rules:
+- Open by introducing this as the next game (e.g., "Next up", "The [team] next face...", "Coming up next", "Next on the docket", "The next contest for").
+- Date: month and day only (e.g., "July 4"). Scraped team: mascot name only (e.g., "Phillies"); for the Athletics use only "Athletics", never Oakland. Opponent: full team name.
+- Time as "0:00 p.m. ET" or "0:00 a.m. ET"; if TBD, say so. TV: use the channel as given; if not specified, omit it or say "check local listings".
+- End every sentence with a period and never use semicolons. No opinionated descriptors like "pivotal" or "crucial"."""
+
+def build_snippet_prompt(formatted_game_data):
+    """Builds the Gemini prompt, listing only the game details that are actually known."""
+    details = [
+        f"- Date: {formatted_game_data['date']}",
+        f"- Matchup: {formatted_game_data['scraped_team_mascot']} {formatted_game_data['matchup_conjunction']} {formatted_game_data['opponent_full_name']}",
+        f"- Time: {formatted_game_data['time']}",
+        f"- TV: {formatted_game_data['tv']}",
+    ]
+    if formatted_game_data['venue'] != "Venue TBD":
+        details.append(f"- Venue: {formatted_game_data['venue']}")
+    if formatted_game_data['scraped_team_starter'] != "Starter TBD":
+        details.append(f"- {formatted_game_data['scraped_team_mascot']} starter: {formatted_game_data['scraped_team_starter']}")
+    if formatted_game_data['opponent_starter'] != "Starter TBD":
+        details.append(f"- {formatted_game_data['opponent_full_name']} starter: {formatted_game_data['opponent_starter']}")
+    return SNIPPET_PROMPT_RULES + "\n\nGame details:\n" + "\n".join(details) + "\n\nSnippet:"
+
+@st.cache_resource
+def get_snippet_cache():
+    """
+    Process-wide {cache key: snippet} store, shared by the blocking and streaming Gemini paths, so
+    snippets survive app restarts instead of re-spending Gemini tokens.
+    st.cache_data can't serve here because a stream is consumed by the UI as it arrives,
+    so the full text is only known (and stored) once the stream ends.
+    """
+    return TTLStore.open(SNIPPET_CACHE_PATH, SNIPPET_CACHE_TTL)
 
-    # Construct the prompt
-    prompt = f"""
-    You are an expert sports journalist AI.
-    Generate a 1-2 sentence snippet summarizing the following upcoming MLB game.
-    The tone should be human-like and professional, suitable for embedding directly into a news article.
-    Follow these specific formatting and content rules:
-    - Date: Month and Day only (e.g., "July 4").
-    - Scraped Team: Use only the mascot name (e.g., "Phillies").
-    - Opponent: Use the opponent's full team name (e.g., "New York Mets").
-    - Game Time: Format as "0:00 p.m. ET" or "0:00 a.m. ET". If time is TBD, state that.
-    - TV Channel: Use full names: "Apple TV" for ATV, "Amazon" for AMZN, "MLB Network" for MLBN. If other, use as provided. If not specified, omit TV info or say "check local listings".
-    - Punctuation: Ensure all sentences end with a period. Avoid using semicolons; use periods to separate distinct clauses or before phrases like "check local listings".
-    - For the Athletics only use team name. Do not mention Oakland.
-    - Avoid bias or opinionated descriptors like "pivotal" or "crucial".
-    - Start the snippet with a phrase that introduces that this is the next game (such as "Next up", "The [scraped team name] next face...", "Coming up next", "Next on the docket", "The next contest for", etc.)
-
-    Game Details:
-    - Date: {formatted_game_data['date']}
-    - Scraped Team: {formatted_game_data['scraped_team_mascot']}
-    - Opponent: {formatted_game_data['opponent_full_name']}
-    - Matchup Type: {formatted_game_data['scraped_team_mascot']} {formatted_game_data['matchup_conjunction']} {formatted_game_data['opponent_full_name']}
-    - Game Time: {formatted_game_data['time']}
-    - TV: {formatted_game_data['tv']}
-    - Venue: {formatted_game_data['venue']}
-    - Scraped Team Starter: {formatted_game_data['scraped_team_starter']}
-    - Opponent Starter: {formatted_game_data['opponent_starter']}
-
-    Snippet (1-2 sentences, using periods instead of semicolons)::
+def snippet_cache_key(game_data, selected_team_info):
     """
+    Snippet cache key built from the raw scraped game, so a cache hit needs no prompt formatting.
+    The prompt rules are part of the key, so editing them invalidates stored snippets.
+    """
+    return repr((SNIPPET_PROMPT_RULES, SNIPPET_GENERATION_CONFIG, selected_team_info[0], sorted(game_data.items())))
+
+def get_cached_snippet(cache_key):
+    return get_snippet_cache().get(cache_key)
+
+def cache_snippet(cache_key, snippet):
+    get_snippet_cache().put(cache_key, snippet)
+
+class SnippetTruncatedError(Exception):
+    """Gemini stopped at max_output_tokens, so the snippet was cut off."""
+
+def finish_reason_name(response):
+    """Name of the first candidate's finish reason ("STOP", "MAX_TOKENS", "SAFETY", ...), or None."""
+    if not response.candidates:
+        return None
+    reason = response.candidates[0].finish_reason
+    return getattr(reason, 'name', reason) # The SDK gives an enum; compare on its name
+
+def empty_response_message(response):
+    """Explains a Gemini response that carried no text (blocked or empty)."""
+    if finish_reason_name(response) == 'SAFETY':
+        return "Snippet generation failed due to safety settings. Please check the input data."
+    return "Gemini returned an empty response."
+
+def generate_game_snippet(game_data, selected_team_info):
+    if not gemini_model:
+        return "Gemini API not configured. Cannot generate snippet."
 
+    cache_key = snippet_cache_key(game_data, selected_team_info)
+    snippet = get_cached_snippet(cache_key)
+    if snippet:
+        return snippet # Cache hit: no formatting or Gemini call needed
+    prompt = build_snippet_prompt(format_data_for_gemini_prompt(game_data, selected_team_info))
     try:
         # st.write("Sending prompt to Gemini:") # For debugging
         # st.text(prompt)
-        response = gemini_model.generate_content(prompt)
-        if response.parts:
-            return response.text.strip()
-        else: # Handle cases where response might be blocked or empty
-            candidate = response.candidates[0]
-            if candidate.finish_reason == 'SAFETY':
-                return "Snippet generation failed due to safety settings. Please check the input data."
-            return "Gemini returned an empty response."
+        return request_snippet_text(prompt, cache_key)
     except Exception as e:
         return f"Error generating snippet with Gemini: {e}"
 
+def request_snippet_text(prompt, cache_key):
+    """
+    Sends the prompt to Gemini and returns the snippet text.
+    Successful snippets are cached under cache_key; exceptions propagate so failed calls are not cached.
+    A snippet cut off at the token cap raises SnippetTruncatedError.
+    """
+    response = gemini_model.generate_content(prompt, generation_config=SNIPPET_GENERATION_CONFIG)
+    if response.parts:
+        if finish_reason_name(response) == 'MAX_TOKENS':
+            raise SnippetTruncatedError("the snippet was cut off at the output token limit.")
+        snippet = response.text.strip()
+        cache_snippet(cache_key, snippet)
+        return snippet
+    else: # Handle cases where response might be blocked or empty
+        return empty_response_message(response)
+
+def stream_snippet_text(prompt, cache_key):
+    """
+    Yields the snippet text as Gemini streams it, for st.write_stream. The full text is cached
+    under cache_key once the stream ends; exceptions propagate to the caller. A snippet cut off at
+    the token cap raises SnippetTruncatedError at the end of the stream instead of being cached.
+    """
+    response = gemini_model.generate_content(prompt, generation_config=SNIPPET_GENERATION_CONFIG, stream=True)
+    chunks = []
+    for chunk in response:
+        if chunk.parts:
+            chunks.append(chunk.text)
+            yield chunk.text
+    snippet = "".join(chunks).strip()
+    if snippet and finish_reason_name(response) == 'MAX_TOKENS':
+        raise SnippetTruncatedError("the snippet was cut off at the output token limit.")
+    if snippet:
+        cache_snippet(cache_key, snippet)
+    else:
+        yield empty_response_message(response)
+
+
+def scrape_and_generate_snippets(team_names, max_workers=MAX_CONCURRENT_SCRAPES):
+    """
+    Scrapes several teams concurrently and generates a snippet for each upcoming game.
+    Gemini requests run on their own pool, so each team's snippet starts as soon as its scrape
+    finishes instead of queueing behind the scrapes still waiting for a worker.
+    Returns ({team_name: (game_data, message)}, {team_name: snippet}).
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as scrape_executor, \
+            ThreadPoolExecutor(max_workers=max_workers) as snippet_executor:
+        scrape_futures = {
+            scrape_executor.submit(scrape_team_schedule, MLB_TEAMS[name][3], name): name
+            for name in team_names
+        }
+        results = {}
+        snippet_futures = {}
+        for future in as_completed(scrape_futures):
+            name = scrape_futures[future]
+            results[name] = future.result()
+            game_data = results[name][0]
+            if game_data:
+                snippet_futures[name] = snippet_executor.submit(generate_game_snippet, game_data, MLB_TEAMS[name])
+        snippets = {name: snippet_futures[name].result() for name in team_names if name in snippet_futures}
+    return {name: results[name] for name in team_names}, snippets
+
 
 # --- Streamlit App UI ---
 st.set_page_config(page_title="Next Game Snippet Generator", layout="wide")
 st.title("Next Game Snippet Generator")
 st.markdown("Select an MLB team and click 'Generate' to get the next game's info and an AI-generated snippet.")
 
-sorted_team_names = sorted(MLB_TEAMS.keys())
-options = ["-- Select a Team --"] + sorted_team_names
 selected_team_display_name = st.selectbox(
     "",
-    options=options,
+    options=TEAM_SELECT_OPTIONS,
     index=0
 )
 
-if selected_team_display_name != "-- Select a Team --":
-    team_abbr, team_url_name, team_mascot = MLB_TEAMS[selected_team_display_name]
-    selected_team_info = MLB_TEAMS[selected_team_display_name] # Pass (abbr, url_name, mascot)
-    target_url = generate_team_url(team_abbr, team_url_name)
+if selected_team_display_name != TEAM_SELECT_PLACEHOLDER:
+    selected_team_info = MLB_TEAMS[selected_team_display_name] # Pass (abbr, url_name, mascot, url)
+    target_url = selected_team_info[3]
     
     st.markdown(f"**Generating for:** {selected_team_display_name}")
     st.caption(f"Schedule URL: [{target_url}]({target_url})")
 
-    if st.button(f"Generate"):
-        game_data_raw = None
-        with st.spinner(f"Scraping CBS Sports for {selected_team_display_name} schedule..."):
-            game_data_raw = scrape_team_schedule(target_url, selected_team_display_name)
+    generate_clicked = st.button(f"Generate")
+    refresh_clicked = st.button("Refresh", help="Re-scrape the schedule instead of reusing the last result.")
+    if generate_clicked or refresh_clicked:
+        # The last successful scrape is kept per session until SCHEDULE_CACHE_TTL seconds after its page
+        # was fetched, so unrelated reruns don't refetch it while a long-lived session still picks up
+        # schedule changes
+        scrape_state_key = f"scrape::{selected_team_display_name}"
+        if refresh_clicked:
+            st.session_state.pop(scrape_state_key, None)
+            forget_team_schedule(target_url, selected_team_display_name)
+        fetched_at, game_data_raw, scrape_msg = st.session_state.get(scrape_state_key, (None, None, None))
+        if fetched_at is None or time.time() - fetched_at >= SCHEDULE_CACHE_TTL:
+            with st.spinner(f"Scraping CBS Sports for {selected_team_display_name} schedule..."):
+                game_data_raw, scrape_msg, fetched_at = scrape_team_schedule_with_fetch_time(
+                    target_url, selected_team_display_name
+                )
+            if game_data_raw:
+                st.session_state[scrape_state_key] = (fetched_at, game_data_raw, scrape_msg)
+            else:
+                st.session_state.pop(scrape_state_key, None)
 
         if game_data_raw:
+            if scrape_msg:
+                st.warning(scrape_msg)
             st.success(f"Successfully scraped data for the {selected_team_display_name}!")
             
             # Display raw scraped data as before
             st.subheader(f"Next Game Details:")
-            st.markdown(f"**Date:** {game_data_raw['Date']}")
-            st.markdown(f"**OPP (raw):** {game_data_raw['OPP_raw']}")
-            st.markdown(f"**Time / TV (raw):** {game_data_raw['Time_TV_raw']}")
-            st.markdown(f"**Venue:** {game_data_raw['Venue']}")
-            st.markdown(f"**Home starter:** {game_data_raw['Home_starter']}")
-            st.markdown(f"**Away starter:** {game_data_raw['Away_starter']}")
+            st.table({"Value": {
+                "Date": game_data_raw['Date'],
+                "OPP (raw)": game_data_raw['OPP_raw'],
+                "Time / TV (raw)": game_data_raw['Time_TV_raw'],
+                "Venue": game_data_raw['Venue'],
+                "Home starter": game_data_raw['Home_starter'],
+                "Away starter": game_data_raw['Away_starter'],
+            }})
             st.markdown("---")
 
             # Generate and display Gemini snippet
-            if GEMINI_API_KEY and gemini_model:
+            if gemini_model:
                 st.subheader("AI-Generated Game Snippet:")
-                with st.spinner("Formatting data and generating snippet with Gemini..."):
+                snippet_key = snippet_cache_key(game_data_raw, selected_team_info)
+                snippet = get_cached_snippet(snippet_key)
+                if snippet:
+                    st.markdown(f"> {snippet}")
+                else:
                     formatted_data = format_data_for_gemini_prompt(game_data_raw, selected_team_info)
                     # st.write("Formatted data for prompt:", formatted_data) # For debugging
-                    snippet = generate_game_snippet(formatted_data)
-                st.markdown(f"> {snippet}")
+                    prompt = build_snippet_prompt(formatted_data)
+                    # Show tokens as they arrive; if streaming fails partway, the blocking call's
+                    # result replaces the partial text in the same slot
+                    snippet_slot = st.empty()
+                    try:
+                        with snippet_slot.container():
+                            st.write_stream(chain(("> ",), stream_snippet_text(prompt, snippet_key)))
+                    except Exception:
+                        snippet_slot.markdown(f"> {generate_game_snippet(game_data_raw, selected_team_info)}")
             else:
                 st.warning("Gemini API not configured. Snippet cannot be generated.")
         else:
+            st.error(scrape_msg)
             st.warning(f"Could not retrieve game data for {selected_team_display_name}. Check error messages.")
 else:
     st.info("Please select an MLB team from the dropdown above to begin.")
+
+# --- Multi-team scrape ---
+st.markdown("---")
+st.subheader("Next Games for Multiple Teams")
+multi_team_names = st.multiselect("Select teams to scrape together:", options=SORTED_TEAM_NAMES)
+multi_with_snippets = st.checkbox("Also generate AI snippets", disabled=not gemini_model)
+
+scrape_selected_clicked = st.button("Scrape Selected Teams", disabled=not multi_team_names)
+scrape_all_clicked = st.button("Scrape All Teams")
+
+if scrape_selected_clicked or scrape_all_clicked:
+    teams_to_scrape = SORTED_TEAM_NAMES if scrape_all_clicked else multi_team_names
+    multi_snippets = {}
+    with st.spinner(f"Scraping CBS Sports for {len(teams_to_scrape)} team schedules..."):
+        if multi_with_snippets:
+            multi_results, multi_snippets = scrape_and_generate_snippets(teams_to_scrape)
+        else:
+            multi_results = scrape_many_teams(teams_to_scrape)
+
+    multi_rows = []
+    for team_name, (game_data, scrape_msg) in multi_results.items():
+        if game_data:
+            multi_rows.append({
+                "Team": team_name,
+                "Date": game_data['Date'],
+                "OPP (raw)": game_data['OPP_raw'],
+                "Time / TV (raw)": game_data['Time_TV_raw'],
+                "Venue": game_data['Venue'],
+                "Home starter": game_data['Home_starter'],
+                "Away starter": game_data['Away_starter'],
+            })
+        else:
+            st.error(scrape_msg)
+
+    if multi_rows:
+        st.dataframe(multi_rows, hide_index=True)
+
+    for team_name, snippet in multi_snippets.items():
+        st.markdown(f"**{team_name}**")
+        st.markdown(f"> {snippet}")
@@ -0,0 +1,61 @@
+"""
+Small sqlite-backed key/value store with a TTL, shared by the schedule page cache and the
+Gemini snippet cache so both survive app restarts.
+"""
+
+import threading
+import time
+import sqlite3
+import hashlib
+
+class TTLStore:
+    """
+    {key: value} store with a TTL, kept in a small sqlite file.
+    Rows are keyed on a sha256 of the key, so long keys (URLs, prompts) index compactly.
+    """
+
+    def __init__(self, path, ttl):
+        self._ttl = ttl
+        self._lock = threading.Lock() # One connection shared by the app's worker threads
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries (key_hash TEXT PRIMARY KEY, stored_at REAL NOT NULL, value BLOB NOT NULL)"
+            )
+            self._conn.execute("DELETE FROM entries WHERE stored_at < ?", (time.time() - ttl,))
+
+    @classmethod
+    def open(cls, path, ttl):
+        """Opens the store at path, falling back to an in-memory database if the file can't be opened."""
+        try:
+            return cls(path, ttl)
+        except sqlite3.Error:
+            return cls(":memory:", ttl)
+
+    @staticmethod
+    def _key(key):
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+    def get_entry(self, key):
+        """Returns (stored_at, value) for a live entry, or None; stored_at is a time.time() stamp."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT stored_at, value FROM entries WHERE key_hash = ?", (self._key(key),)
+            ).fetchone()
+        if row and time.time() - row[0] < self._ttl:
+            return row
+        return None
+
+    def get(self, key):
+        entry = self.get_entry(key)
+        return entry[1] if entry else None
+
+    def put(self, key, value):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?)", (self._key(key), time.time(), value)
+            )
+
+    def discard(self, key):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM entries WHERE key_hash = ?", (self._key(key),))